@@ -1,20 +1,52 @@
 from __future__ import annotations
 
 import os
+import sys
 
 import uvicorn
 
 
-def main() -> None:
-    port = int(os.environ.get("PORT", "8080"))
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=port, log_level="info")
+# Each worker opens its own DATABASE_POOL_MAX_SIZE connections, so the default stays small
+# however many CPUs the machine has; WEB_CONCURRENCY overrides it.
+_MAX_DEFAULT_WORKERS = 4
 
 
-if __name__ == "__main__":
-    main()
+def _usable_cpus() -> int:
+    # os.cpu_count() is the host's count; the affinity mask is what this process may run on.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
 
+def _default_workers() -> int:
+    # In-memory notes live inside a single process, so only fan out across CPUs
+    # when notes are persisted in Postgres and shared by every worker.
+    if (os.environ.get("DATABASE_URL") or "").strip():
+        return min(_usable_cpus(), _MAX_DEFAULT_WORKERS)
+    return 1
 
 
+def migrate() -> None:
+    # One-off schema/data upgrade (e.g. as a deploy step) so app workers boot straight
+    # past the schema probe.
+    from backend.notes_repo import PostgresNotesRepo, make_notes_repo
 
+    repo = make_notes_repo()
+    if not isinstance(repo, PostgresNotesRepo):
+        raise SystemExit("DATABASE_URL is not set; nothing to migrate.")
+    repo.ensure_schema(force=True)
+    repo.close()
+    print("Notes schema is up to date.")
 
 
+def main() -> None:
+    if sys.argv[1:] == ["migrate"]:
+        migrate()
+        return
+    port = int(os.environ.get("PORT", "8080"))
+    workers = int(os.environ.get("WEB_CONCURRENCY") or _default_workers())
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=port, log_level="info", workers=workers)
+
+
+if __name__ == "__main__":
+    main()
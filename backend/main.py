@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
+import threading
+from collections import OrderedDict
 from io import BytesIO
+from typing import Callable, TypeVar
 
+import anyio.to_thread
 import httpx
-from fastapi import FastAPI, HTTPException
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, Response
 from docx import Document
 
 from backend.schemas import (
     ExtractRequest,
     ExtractResponse,
+    NotesAppendAckResponse,
+    NotesAppendBatchRequest,
+    NotesAppendBatchResponse,
     NotesAppendQuestionRequest,
     NotesAppendTurnRequest,
+    NotesAppendTurnsRequest,
+    NotesAppendQAManyRequest,
     NotesAppendQARequest,
     NotesAppendQuizRequest,
     NotesGetResponse,
@@ -23,10 +36,15 @@ from backend.schemas import (
     SessionsListResponse,
 )
 from backend.notes_repo import PostgresNotesRepo, make_notes_repo
-from backend.url_extract import fetch_and_extract_main_text
+from backend.notes_store import NotesAppendResult, NotesRecord
+from backend.url_extract import close_http_client, ensure_fetchable_url, fetch_and_extract_main_text
 
 
-app = FastAPI(title="Voice AI Study Companion API", version="0.2.0")
+app = FastAPI(
+    title="Voice AI Study Companion API",
+    version="0.2.0",
+    default_response_class=ORJSONResponse,
+)
 notes_repo = make_notes_repo()
 
 app.add_middleware(
@@ -52,8 +70,11 @@ def root() -> dict:
             "/notes/set_summary",
             "/notes/append_question",
             "/notes/append_turn",
+            "/notes/append_turns",
             "/notes/append_qa",
+            "/notes/append_qa_many",
             "/notes/append_quiz",
+            "/notes/append_batch",
             "/notes",
             "/notes/download.docx",
         ],
@@ -61,6 +82,113 @@ def root() -> dict:
     }
 
 
+def _notes_response(rec: NotesRecord) -> Response:
+    # Serialize once with orjson, straight from the record: no pydantic model to build, and
+    # orjson writes the slotted NotesTurn/NotesQA rows natively (their field names are the
+    # wire keys). Returning a Response makes FastAPI skip its response_model pass; the
+    # decorator keeps the NotesGetResponse schema for docs, and the key order matches it.
+    body = {
+        "url": rec.url,
+        "summary": rec.summary,
+        "questions": rec.questions,
+        "turns": rec.turns,
+        "qa": rec.qa,
+        "quizzes": [
+            {
+                "question": z.question,
+                "userAnswer": z.user_answer,
+                "correctAnswer": z.correct_answer,
+                "explanation": z.explanation,
+            }
+            for z in rec.quizzes
+        ],
+        "updatedAt": rec.updated_at,
+    }
+    return Response(content=orjson.dumps(body), media_type="application/json")
+
+
+# Webhook retries and double-submits re-send identical Q&A/quiz/question appends and batches.
+# Remember recent ones briefly and acknowledge a repeat without writing a duplicate row.
+# Raw transcript turns are not deduplicated: saying "yes" twice in a minute is real (a batch
+# is only skipped when all of it, turns included, repeats).
+# Per process and best-effort (another worker, or a repeat after 60s, writes again).
+class _PendingAppend:
+    __slots__ = ("done", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: object | None = None
+
+
+# Values are the first call's result (a NotesAppendResult, or a batch's write count).
+_recent_appends: TTLCache[tuple[str, bytes], object] = TTLCache(
+    maxsize=4096, ttl=60
+)
+_recent_appends_lock = threading.Lock()
+
+
+def _append_key(
+    req: NotesAppendQuestionRequest
+    | NotesAppendQARequest
+    | NotesAppendQAManyRequest
+    | NotesAppendQuizRequest
+    | NotesAppendBatchRequest,
+) -> tuple[str, bytes]:
+    payload = f"{type(req).__name__}\0{req.model_dump_json()}".encode("utf-8")
+    return (req.url, hashlib.blake2b(payload, digest_size=16).digest())
+
+
+_T = TypeVar("_T")
+# How long a duplicate waits on the first copy's write before writing itself: a stuck write
+# (say, waiting on pool checkout) shouldn't pin every retry's worker thread along with it.
+_DEDUP_WAIT_S = 5.0
+
+
+def _dedup_append(key: tuple[str, bytes], write: Callable[[], _T]) -> _T:
+    # The lookup and the in-flight claim share one locked section, so a duplicate arriving
+    # while the first copy is still writing waits for its result instead of writing too.
+    while True:
+        with _recent_appends_lock:
+            hit = _recent_appends.get(key)
+            if hit is None:
+                pending = _recent_appends[key] = _PendingAppend()
+                break
+        if not isinstance(hit, _PendingAppend):
+            return hit
+        if not hit.done.wait(_DEDUP_WAIT_S):
+            # Still not done: write anyway (a possible duplicate row beats a hung request).
+            return write()
+        if hit.result is not None:
+            return hit.result
+        # The first copy failed: try the write ourselves.
+    try:
+        pending.result = write()
+    finally:
+        with _recent_appends_lock:
+            if _recent_appends.get(key) is pending:
+                if pending.result is None:
+                    del _recent_appends[key]
+                else:
+                    _recent_appends[key] = pending.result
+        pending.done.set()
+    return pending.result
+
+
+def _forget_appends(url: str) -> None:
+    # After a reset/delete the same content must be writable again.
+    with _recent_appends_lock:
+        for key in [k for k in _recent_appends if k[0] == url]:
+            _recent_appends.pop(key, None)
+
+
+def _append_ack(res: NotesAppendResult) -> Response:
+    # Appends only acknowledge the write; clients fetch the full record via GET /notes.
+    # The hottest responses in the app (one per voice turn), so like _notes_response they
+    # skip FastAPI's response_model validate/serialize pass and go straight to bytes.
+    body = {"ok": True, "url": res.url, "size": res.size, "updatedAt": res.updated_at}
+    return Response(content=orjson.dumps(body), media_type="application/json")
+
+
 @app.get("/health")
 def health() -> dict:
     return {"ok": True}
@@ -68,10 +196,23 @@ def health() -> dict:
 
 @app.on_event("startup")
 def _startup() -> None:
+    # Sync endpoints run on anyio's worker threads (40 by default) and hold one while they
+    # wait on the database. THREADPOOL_SIZE lets a worker with a bigger connection pool
+    # actually keep that many queries in flight.
+    threads = int(os.environ.get("THREADPOOL_SIZE") or 0)
+    if threads > 0:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
     if isinstance(notes_repo, PostgresNotesRepo):
         notes_repo.ensure_schema()
 
 
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    await close_http_client()
+    if isinstance(notes_repo, PostgresNotesRepo):
+        notes_repo.close()
+
+
 @app.get("/sessions", response_model=SessionsListResponse)
 def sessions_list(limit: int = 50) -> SessionsListResponse:
     try:
@@ -94,11 +235,42 @@ def sessions_touch(req: SessionTouchRequest) -> dict:
 def sessions_delete(url: str) -> dict:
     try:
         notes_repo.delete_session(url)
+        _forget_appends(url)
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sessions delete failed: {e}")
 
 
+_MIN_EXTRACT_CHARS = 200
+# Re-analysing or re-joining a page re-sends the same URL; keep recent extractions
+# for a few minutes. Only touched from the event loop, so no lock is needed.
+_extract_cache: TTLCache[str, str] = TTLCache(maxsize=512, ttl=600)
+_extract_inflight: dict[str, asyncio.Task[str]] = {}
+
+
+def _extract_done(url: str, task: asyncio.Task[str]) -> None:
+    _extract_inflight.pop(url, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    text = task.result()
+    if text and len(text) >= _MIN_EXTRACT_CHARS:
+        _extract_cache[url] = text
+
+
+async def _extract_text_cached(url: str) -> str:
+    text = _extract_cache.get(url)
+    if text is not None:
+        return text
+    # Concurrent requests for the same URL share one fetch.
+    task = _extract_inflight.get(url)
+    if task is None:
+        task = asyncio.create_task(fetch_and_extract_main_text(url))
+        _extract_inflight[url] = task
+        task.add_done_callback(lambda t: _extract_done(url, t))
+    # Shield so one client disconnecting does not cancel the fetch for the others.
+    return await asyncio.shield(task)
+
+
 @app.post("/extract", response_model=ExtractResponse)
 async def extract(req: ExtractRequest) -> ExtractResponse:
     """
@@ -106,120 +278,137 @@ async def extract(req: ExtractRequest) -> ExtractResponse:
     This endpoint only fetches & extracts the main page text.
     """
     try:
-        text = await fetch_and_extract_main_text(req.url)
-        if not text or len(text) < 200:
+        ensure_fetchable_url(req.url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        text = await _extract_text_cached(req.url)
+        if not text or len(text) < _MIN_EXTRACT_CHARS:
             raise HTTPException(status_code=400, detail="Could not extract enough readable text from that URL.")
         return ExtractResponse(url=req.url, cleanedText=text)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extract failed: {e}")
 
 
 @app.post("/notes/reset", response_model=NotesGetResponse)
-def notes_reset(req: NotesResetRequest) -> NotesGetResponse:
+def notes_reset(req: NotesResetRequest) -> Response:
     try:
         rec = notes_repo.reset(req.url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes reset failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
+    _forget_appends(req.url)
+    return _notes_response(rec)
 
 
 @app.post("/notes/set_summary", response_model=NotesGetResponse)
-def notes_set_summary(req: NotesSetSummaryRequest) -> NotesGetResponse:
+def notes_set_summary(req: NotesSetSummaryRequest) -> Response:
     try:
         rec = notes_repo.set_summary(req.url, req.summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes set_summary failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
-
-
-@app.post("/notes/append_question", response_model=NotesGetResponse)
-def notes_append_question(req: NotesAppendQuestionRequest) -> NotesGetResponse:
+    return _notes_response(rec)
+
+
+@app.post("/notes/append_question", response_model=NotesAppendAckResponse)
+def notes_append_question(req: NotesAppendQuestionRequest) -> Response:
     try:
-        rec = notes_repo.append_question(req.url, req.question)
+        res = _dedup_append(_append_key(req), lambda: notes_repo.append_question(req.url, req.question))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes append_question failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
-
-
-@app.post("/notes/append_turn", response_model=NotesGetResponse)
-def notes_append_turn(req: NotesAppendTurnRequest) -> NotesGetResponse:
+    return _append_ack(res)
+
+
+@app.post("/notes/append_turn", response_model=NotesAppendAckResponse)
+def notes_append_turn(req: NotesAppendTurnRequest) -> Response:
     try:
-        rec = notes_repo.append_turn(req.url, req.role, req.text)
+        res = notes_repo.append_turn(req.url, req.role, req.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes append_turn failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
-
-
-@app.post("/notes/append_qa", response_model=NotesGetResponse)
-def notes_append_qa(req: NotesAppendQARequest) -> NotesGetResponse:
+    return _append_ack(res)
+
+
+@app.post("/notes/append_turns", response_model=NotesAppendAckResponse)
+def notes_append_turns(req: NotesAppendTurnsRequest) -> Response:
     try:
-        rec = notes_repo.append_qa(req.url, req.question, req.answer)
+        res = notes_repo.append_turns_many(req.url, [(t.role, t.text) for t in req.turns])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Notes append_turns failed: {e}")
+    return _append_ack(res)
+
+
+@app.post("/notes/append_qa", response_model=NotesAppendAckResponse)
+def notes_append_qa(req: NotesAppendQARequest) -> Response:
+    try:
+        res = _dedup_append(_append_key(req), lambda: notes_repo.append_qa(req.url, req.question, req.answer))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes append_qa failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
-
-
-@app.post("/notes/append_quiz", response_model=NotesGetResponse)
-def notes_append_quiz(req: NotesAppendQuizRequest) -> NotesGetResponse:
+    return _append_ack(res)
+
+
+@app.post("/notes/append_qa_many", response_model=NotesAppendAckResponse)
+def notes_append_qa_many(req: NotesAppendQAManyRequest) -> Response:
+    try:
+        res = _dedup_append(
+            _append_key(req),
+            lambda: notes_repo.append_qa_many(req.url, [(it.question, it.answer) for it in req.items]),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Notes append_qa_many failed: {e}")
+    return _append_ack(res)
+
+
+@app.post("/notes/append_quiz", response_model=NotesAppendAckResponse)
+def notes_append_quiz(req: NotesAppendQuizRequest) -> Response:
     try:
-        rec = notes_repo.append_quiz(req.url, req.question, req.userAnswer, req.correctAnswer, req.explanation)
+        res = _dedup_append(
+            _append_key(req),
+            lambda: notes_repo.append_quiz(
+                req.url, req.question, req.userAnswer, req.correctAnswer, req.explanation
+            ),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes append_quiz failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
+    return _append_ack(res)
+
+
+@app.post("/notes/append_batch", response_model=NotesAppendBatchResponse)
+def notes_append_batch(req: NotesAppendBatchRequest) -> NotesAppendBatchResponse:
+    # Everything one voice turn produces, in one call: applied together (one transaction and
+    # one round trip on Postgres), in the order summary, questions, turns, qa, quizzes.
+    def write() -> int:
+        with notes_repo.batch(req.url) as b:
+            if req.summary is not None:
+                b.set_summary(req.summary)
+            for question in req.questions:
+                b.append_question(question)
+            for t in req.turns:
+                b.append_turn(t.role, t.text)
+            for it in req.qa:
+                b.append_qa(it.question, it.answer)
+            for z in req.quizzes:
+                b.append_quiz(z.question, z.userAnswer, z.correctAnswer, z.explanation)
+        return len(b.ops)
+
+    try:
+        written = _dedup_append(_append_key(req), write)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Notes append_batch failed: {e}")
+    return NotesAppendBatchResponse(url=req.url, written=written)
 
 
 @app.get("/notes", response_model=NotesGetResponse)
-def notes_get(url: str) -> NotesGetResponse:
+def notes_get(url: str) -> Response:
+    if isinstance(notes_repo, PostgresNotesRepo):
+        try:
+            body = notes_repo.get_json(url)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Notes get failed: {e}")
+        if body is not None:
+            return Response(content=body, media_type="application/json")
     try:
         rec = notes_repo.get(url)
     except Exception as e:
@@ -230,22 +419,63 @@ def notes_get(url: str) -> NotesGetResponse:
             rec = notes_repo.reset(url)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Notes reset failed: {e}")
-    return NotesGetResponse(
-        url=rec.url,
-        summary=rec.summary,
-        questions=rec.questions,
-        turns=rec.turns,
-        qa=rec.qa,
-        quizzes=rec.quizzes,
-        updatedAt=rec.updated_at,
-    )
+    return _notes_response(rec)
+
+
+_DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+_DOCX_CACHE_MAX = 128
+# Rendered documents keyed by (url, updated_at): any write bumps updated_at, so stale
+# entries are simply never hit again and age out of the LRU.
+_docx_cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+_docx_cache_lock = threading.Lock()
+
+
+def _load_docx_template() -> bytes:
+    bio = BytesIO()
+    Document().save(bio)
+    return bio.getvalue()
+
+
+# python-docx re-opens its bundled default template from disk on every Document();
+# load it once and open each new document from memory instead.
+_DOCX_TEMPLATE = _load_docx_template()
+
+
+def _docx_etag(rec: NotesRecord) -> str:
+    digest = hashlib.blake2b(f"{rec.url}\0{rec.updated_at}".encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _cached_docx(rec: NotesRecord) -> bytes:
+    key = (rec.url, rec.updated_at)
+    with _docx_cache_lock:
+        data = _docx_cache.get(key)
+        if data is not None:
+            _docx_cache.move_to_end(key)
+            return data
+    data = _render_notes_docx(rec)
+    with _docx_cache_lock:
+        _docx_cache[key] = data
+        while len(_docx_cache) > _DOCX_CACHE_MAX:
+            _docx_cache.popitem(last=False)
+    return data
 
 
 @app.get("/notes/download.docx")
-def notes_download_docx(url: str) -> StreamingResponse:
+def notes_download_docx(url: str, if_none_match: str | None = Header(default=None)) -> Response:
     rec = notes_repo.get(url) or notes_repo.reset(url)
 
-    doc = Document()
+    etag = _docx_etag(rec)
+    if if_none_match and etag in {t.strip() for t in if_none_match.split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    filename = "study-notes.docx"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "ETag": etag}
+    return Response(content=_cached_docx(rec), media_type=_DOCX_MEDIA_TYPE, headers=headers)
+
+
+def _render_notes_docx(rec: NotesRecord) -> bytes:
+    doc = Document(BytesIO(_DOCX_TEMPLATE))
     doc.add_heading("Voice AI Study Notes", level=1)
     doc.add_paragraph(f"Source URL: {rec.url}")
     doc.add_paragraph(f"Last updated: {rec.updated_at}")
@@ -256,8 +486,8 @@ def notes_download_docx(url: str) -> StreamingResponse:
     doc.add_heading("Q&A", level=2)
     if rec.qa:
         for idx, pair in enumerate(rec.qa, start=1):
-            q = (pair.get("q") or "").strip()
-            a = (pair.get("a") or "").strip()
+            q = pair.q.strip()
+            a = pair.a.strip()
             if q:
                 doc.add_paragraph(f"Q{idx}. {q}")
             if a:
@@ -269,10 +499,10 @@ def notes_download_docx(url: str) -> StreamingResponse:
     doc.add_heading("Quizzes", level=2)
     if rec.quizzes:
         for idx, qz in enumerate(rec.quizzes, start=1):
-            q = (qz.get("question") or "").strip()
-            ua = (qz.get("userAnswer") or "").strip()
-            ca = (qz.get("correctAnswer") or "").strip()
-            ex = (qz.get("explanation") or "").strip()
+            q = qz.question.strip()
+            ua = qz.user_answer.strip()
+            ca = qz.correct_answer.strip()
+            ex = qz.explanation.strip()
             if q:
                 doc.add_paragraph(f"Quiz {idx}: {q}")
             if ua:
@@ -289,8 +519,8 @@ def notes_download_docx(url: str) -> StreamingResponse:
     if rec.turns:
         doc.add_heading("Call transcript (raw)", level=2)
         for t in rec.turns:
-            role = (t.get("role") or "").strip().lower()
-            text = (t.get("text") or "").strip()
+            role = t.role.strip().lower()
+            text = t.text.strip()
             if not text:
                 continue
             prefix = "You:" if role == "user" else "Tutor:"
@@ -298,15 +528,8 @@ def notes_download_docx(url: str) -> StreamingResponse:
 
     bio = BytesIO()
     doc.save(bio)
-    bio.seek(0)
-
-    filename = "study-notes.docx"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return StreamingResponse(
-        bio,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers=headers,
-    )
+    # Sent in one go (not streamed) so the response carries a Content-Length.
+    return bio.getvalue()
 
 
 
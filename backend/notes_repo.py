@@ -1,26 +1,63 @@
 from __future__ import annotations
 
+import atexit
+import functools
 import os
-import json
-from typing import Protocol
-
-from backend.notes_store import NotesRecord, append_qa, append_quiz, get_notes, reset_notes, set_summary
+import threading
+import time
+from collections import OrderedDict
+from contextlib import AbstractContextManager, contextmanager
+from typing import Iterator, Protocol
+
+import orjson
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # Postgres deps are optional: local dev runs on in-memory notes.
+    ConnectionPool = None  # type: ignore[assignment,misc]
+
+from backend.notes_store import (
+    NotesAppendResult,
+    NotesQA,
+    NotesQuiz,
+    NotesRecord,
+    NotesTurn,
+    append_qa,
+    append_qa_many,
+    append_question,
+    append_quiz,
+    append_turn,
+    append_turns_many,
+    apply_batch,
+    delete_notes,
+    get_notes,
+    list_notes,
+    normalize_role,
+    reset_notes,
+    set_summary,
+    touch_notes,
+)
 
 
 class NotesRepo(Protocol):
+    # Text arrives already trimmed: the request models strip whitespace at the API boundary.
     def reset(self, url: str) -> NotesRecord: ...
 
     def set_summary(self, url: str, summary: str) -> NotesRecord: ...
 
-    def append_question(self, url: str, question: str) -> NotesRecord: ...
+    def append_question(self, url: str, question: str) -> NotesAppendResult: ...
+
+    def append_turn(self, url: str, role: str, text: str) -> NotesAppendResult: ...
+
+    def append_turns_many(self, url: str, turns: list[tuple[str, str]]) -> NotesAppendResult: ...
 
-    def append_turn(self, url: str, role: str, text: str) -> NotesRecord: ...
+    def append_qa(self, url: str, question: str, answer: str) -> NotesAppendResult: ...
 
-    def append_qa(self, url: str, question: str, answer: str) -> NotesRecord: ...
+    def append_qa_many(self, url: str, pairs: list[tuple[str, str]]) -> NotesAppendResult: ...
 
     def append_quiz(
         self, url: str, question: str, user_answer: str, correct_answer: str, explanation: str
-    ) -> NotesRecord: ...
+    ) -> NotesAppendResult: ...
 
     def get(self, url: str) -> NotesRecord | None: ...
 
@@ -30,6 +67,42 @@ class NotesRepo(Protocol):
 
     def touch_session(self, url: str) -> None: ...
 
+    def batch(self, url: str) -> AbstractContextManager[NotesBatch]: ...
+
+
+class NotesBatch:
+    """
+    Writes for one url, buffered by `with repo.batch(url) as b:` and applied together when the
+    block exits cleanly (all in one transaction for Postgres). Nothing is written on error.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ops: list[tuple[str, tuple[str, ...]]] = []
+
+    def set_summary(self, summary: str) -> None:
+        self.ops.append(("summary", (summary,)))
+
+    def append_question(self, question: str) -> None:
+        if not question:
+            raise ValueError("Missing question")
+        self.ops.append(("question", (question,)))
+
+    def append_turn(self, role: str, text: str) -> None:
+        if not text:
+            raise ValueError("Missing text")
+        self.ops.append(("turn", (normalize_role(role), text)))
+
+    def append_qa(self, question: str, answer: str) -> None:
+        if not question or not answer:
+            raise ValueError("Missing question/answer")
+        self.ops.append(("qa", (question, answer)))
+
+    def append_quiz(self, question: str, user_answer: str, correct_answer: str, explanation: str) -> None:
+        if not question:
+            raise ValueError("Missing question")
+        self.ops.append(("quiz", (question, user_answer, correct_answer, explanation)))
+
 
 class InMemoryNotesRepo:
     def reset(self, url: str) -> NotesRecord:
@@ -38,51 +111,260 @@ class InMemoryNotesRepo:
     def set_summary(self, url: str, summary: str) -> NotesRecord:
         return set_summary(url, summary)
 
-    def append_question(self, url: str, question: str) -> NotesRecord:
-        # Lazy import to avoid circular deps.
-        from backend.notes_store import append_question  # type: ignore
+    def append_question(self, url: str, question: str) -> NotesAppendResult:
+        rec = append_question(url, question)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.questions))
 
-        return append_question(url, question)
+    def append_turn(self, url: str, role: str, text: str) -> NotesAppendResult:
+        rec = append_turn(url, role, text)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.turns))
 
-    def append_turn(self, url: str, role: str, text: str) -> NotesRecord:
-        # Lazy import to avoid circular deps.
-        from backend.notes_store import append_turn  # type: ignore
+    def append_turns_many(self, url: str, turns: list[tuple[str, str]]) -> NotesAppendResult:
+        rec = append_turns_many(url, turns)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.turns))
 
-        return append_turn(url, role, text)
+    def append_qa(self, url: str, question: str, answer: str) -> NotesAppendResult:
+        rec = append_qa(url, question, answer)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.qa))
 
-    def append_qa(self, url: str, question: str, answer: str) -> NotesRecord:
-        return append_qa(url, question, answer)
+    def append_qa_many(self, url: str, pairs: list[tuple[str, str]]) -> NotesAppendResult:
+        rec = append_qa_many(url, pairs)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.qa))
 
     def append_quiz(
         self, url: str, question: str, user_answer: str, correct_answer: str, explanation: str
-    ) -> NotesRecord:
-        return append_quiz(url, question, user_answer, correct_answer, explanation)
+    ) -> NotesAppendResult:
+        rec = append_quiz(url, question, user_answer, correct_answer, explanation)
+        return NotesAppendResult(url=rec.url, updated_at=rec.updated_at, size=len(rec.quizzes))
 
     def get(self, url: str) -> NotesRecord | None:
         return get_notes(url)
 
     def list_sessions(self, limit: int = 50) -> list[dict[str, str]]:
         # In-memory: list existing note records by updated_at
-        try:
-            from backend.notes_store import _STORE  # type: ignore
-
-            items = sorted(_STORE.values(), key=lambda r: r.updated_at or "", reverse=True)
-            return [{"url": r.url, "updatedAt": r.updated_at} for r in items[: max(1, int(limit))]]
-        except Exception:
-            return []
+        return [{"url": r.url, "updatedAt": r.updated_at} for r in list_notes(limit)]
 
     def delete_session(self, url: str) -> None:
-        try:
-            from backend.notes_store import _STORE  # type: ignore
-
-            _STORE.pop(url, None)
-        except Exception:
-            return
+        delete_notes(url)
 
     def touch_session(self, url: str) -> None:
-        # Best-effort: touching in-memory notes means reset if missing, otherwise update timestamp.
-        rec = get_notes(url) or reset_notes(url)
-        rec.touch()
+        # Touching in-memory notes creates them if missing, otherwise updates the timestamp.
+        touch_notes(url)
+
+    @contextmanager
+    def batch(self, url: str) -> Iterator[NotesBatch]:
+        b = NotesBatch(url)
+        yield b
+        if b.ops:
+            apply_batch(url, b.ops)
+
+
+# Statement texts for the hot paths. Module constants keep each text byte-identical across
+# calls and methods, which is what lets prepare_threshold reuse one server-side plan.
+# updated_at leaves Postgres already formatted the way the API reports it (what
+# datetime.isoformat() gives for a UTC timestamp, but always with microseconds), so reads and
+# write acks build no datetime and every path (including get_json) renders it identically.
+_UTC_ISO = """'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'"""
+
+_SQL_SELECT_UPDATED_AT = f"""
+SELECT to_char(updated_at AT TIME ZONE 'UTC', {_UTC_ISO}) FROM notes WHERE url = %s;
+"""
+
+# Reset is one atomic statement: blank the parent row and clear every side table for it.
+# The caller already knows the result is empty, so only updated_at comes back.
+_SQL_RESET_NOTE = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, '', now())
+  ON CONFLICT (url) DO UPDATE
+    SET summary = EXCLUDED.summary,
+        updated_at = EXCLUDED.updated_at
+  RETURNING url, updated_at
+), dx AS (
+  DELETE FROM notes_questions x USING n WHERE x.url = n.url
+), dt AS (
+  DELETE FROM notes_turns t USING n WHERE t.url = n.url
+), dq AS (
+  DELETE FROM notes_qa q USING n WHERE q.url = n.url
+), dz AS (
+  DELETE FROM notes_quizzes z USING n WHERE z.url = n.url
+)
+SELECT to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO}) FROM n;
+"""
+
+_SQL_SET_SUMMARY = """
+INSERT INTO notes (url, summary, updated_at)
+VALUES (%s, %s, now())
+ON CONFLICT (url) DO UPDATE
+  SET summary = EXCLUDED.summary,
+      updated_at = EXCLUDED.updated_at
+RETURNING url;
+"""
+
+_SQL_ENSURE_NOTE = """
+INSERT INTO notes (url, summary, updated_at)
+VALUES (%s, '', now())
+ON CONFLICT (url) DO NOTHING;
+"""
+
+# Single-row side-table appends are one statement each: upsert the parent row, insert the child
+# from its RETURNING, report the new count. Every part of a statement reads the same snapshot,
+# so the count doesn't include the row being inserted yet: hence the + 1.
+_SQL_APPEND_QUESTION = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, '', now())
+  ON CONFLICT (url) DO UPDATE SET updated_at = EXCLUDED.updated_at
+  RETURNING url, updated_at
+), ins AS (
+  INSERT INTO notes_questions (url, question) SELECT n.url, %s FROM n
+)
+SELECT (SELECT count(*) FROM notes_questions x WHERE x.url = n.url) + 1 AS size,
+       to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO})
+  FROM n;
+"""
+
+_SQL_APPEND_TURN = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, '', now())
+  ON CONFLICT (url) DO UPDATE SET updated_at = EXCLUDED.updated_at
+  RETURNING url, updated_at
+), ins AS (
+  INSERT INTO notes_turns (url, role, text) SELECT n.url, %s, %s FROM n
+)
+SELECT (SELECT count(*) FROM notes_turns t WHERE t.url = n.url) + 1 AS size,
+       to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO})
+  FROM n;
+"""
+
+_SQL_APPEND_QA = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, '', now())
+  ON CONFLICT (url) DO UPDATE SET updated_at = EXCLUDED.updated_at
+  RETURNING url, updated_at
+), ins AS (
+  INSERT INTO notes_qa (url, q, a) SELECT n.url, %s, %s FROM n
+)
+SELECT (SELECT count(*) FROM notes_qa q WHERE q.url = n.url) + 1 AS size,
+       to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO})
+  FROM n;
+"""
+
+_SQL_APPEND_QUIZ = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, '', now())
+  ON CONFLICT (url) DO UPDATE SET updated_at = EXCLUDED.updated_at
+  RETURNING url, updated_at
+), ins AS (
+  INSERT INTO notes_quizzes (url, question, user_answer, correct_answer, explanation)
+  SELECT n.url, %s, %s, %s, %s FROM n
+)
+SELECT (SELECT count(*) FROM notes_quizzes z WHERE z.url = n.url) + 1 AS size,
+       to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO})
+  FROM n;
+"""
+
+# Batches keep bootstrap / executemany / bump as separate statements inside one pipeline.
+_SQL_INSERT_TURN = "INSERT INTO notes_turns (url, role, text) VALUES (%s, %s, %s);"
+_SQL_COPY_TURNS = "COPY notes_turns (url, role, text) FROM STDIN"
+# Rows at which append_turns_many switches from a pipelined executemany to COPY.
+_COPY_MIN_ROWS = 100
+
+_SQL_BUMP_TURNS = f"""
+UPDATE notes
+   SET updated_at = now()
+ WHERE url = %s
+RETURNING (SELECT count(*) FROM notes_turns WHERE url = %s) AS size,
+          to_char(updated_at AT TIME ZONE 'UTC', {_UTC_ISO});
+"""
+
+_SQL_INSERT_QA = "INSERT INTO notes_qa (url, q, a) VALUES (%s, %s, %s);"
+
+_SQL_BUMP_QA = f"""
+UPDATE notes
+   SET updated_at = now()
+ WHERE url = %s
+RETURNING (SELECT count(*) FROM notes_qa WHERE url = %s) AS size,
+          to_char(updated_at AT TIME ZONE 'UTC', {_UTC_ISO});
+"""
+
+# The API-shaped note document for a notes row aliased n, side tables aggregated in.
+_SQL_NOTE_DOC = f"""json_build_object(
+         'url', n.url,
+         'summary', n.summary,
+         'questions', COALESCE(
+           (SELECT json_agg(x.question ORDER BY x.id) FROM notes_questions x WHERE x.url = n.url),
+           '[]'::json),
+         'turns', COALESCE(
+           (SELECT json_agg(json_build_object('role', t.role, 'text', t.text) ORDER BY t.id)
+              FROM notes_turns t WHERE t.url = n.url),
+           '[]'::json),
+         'qa', COALESCE(
+           (SELECT json_agg(json_build_object('q', q.q, 'a', q.a) ORDER BY q.id)
+              FROM notes_qa q WHERE q.url = n.url),
+           '[]'::json),
+         'quizzes', COALESCE(
+           (SELECT json_agg(
+                     json_build_object(
+                       'question', z.question,
+                       'userAnswer', z.user_answer,
+                       'correctAnswer', z.correct_answer,
+                       'explanation', z.explanation
+                     ) ORDER BY z.id)
+              FROM notes_quizzes z WHERE z.url = n.url),
+           '[]'::json),
+         'updatedAt', to_char(n.updated_at AT TIME ZONE 'UTC', {_UTC_ISO})
+       )"""
+
+_SQL_SELECT_NOTE_JSON = f"""
+SELECT {_SQL_NOTE_DOC}::text
+  FROM notes n
+ WHERE n.url = %s;
+"""
+
+# set_summary() writes and reads back in one statement. The side-table subqueries see the
+# statement's snapshot, which is fine as the upsert doesn't touch them; the notes fields come
+# from the upsert's RETURNING (the snapshot wouldn't show the new summary, or a new row).
+_SQL_SET_SUMMARY_NOTE = f"""
+WITH n AS (
+  INSERT INTO notes (url, summary, updated_at)
+  VALUES (%s, %s, now())
+  ON CONFLICT (url) DO UPDATE
+    SET summary = EXCLUDED.summary,
+        updated_at = EXCLUDED.updated_at
+  RETURNING url, summary, updated_at
+)
+SELECT {_SQL_NOTE_DOC}::text FROM n;
+"""
+
+_SQL_LIST_SESSIONS = f"""
+SELECT url, to_char(updated_at AT TIME ZONE 'UTC', {_UTC_ISO}) FROM notes ORDER BY updated_at DESC LIMIT %s;
+"""
+
+_SQL_DELETE_NOTE = "DELETE FROM notes WHERE url = %s;"
+
+# NotesBatch op kind -> statement; each takes (url, *op params).
+_SQL_BATCH_OPS = {
+    "summary": _SQL_SET_SUMMARY,
+    "question": _SQL_APPEND_QUESTION,
+    "turn": _SQL_APPEND_TURN,
+    "qa": _SQL_APPEND_QA,
+    "quiz": _SQL_APPEND_QUIZ,
+}
+
+_SQL_TOUCH_NOTE = """
+INSERT INTO notes (url, summary, updated_at)
+VALUES (%s, '', now())
+ON CONFLICT (url) DO UPDATE
+  SET updated_at = now();
+"""
+
+
+_READ_CACHE_SIZE = 256
+_READ_CACHE_FRESH_S = 1.0
 
 
 class PostgresNotesRepo:
@@ -91,381 +373,536 @@ class PostgresNotesRepo:
     Requires DATABASE_URL.
     """
 
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        plan_cache_mode: str | None = None,
+        prepare_threshold: int | None = 1,
+    ):
         self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max_size
+        # None disables server-side prepared statements (needed behind a transaction-pooling
+        # PgBouncer older than 1.21, where the next statement may land on another backend).
+        self.prepare_threshold = prepare_threshold
+        # At the default threshold the hot statements below pass prepare=True, so they are
+        # prepared on first use rather than on the second. A higher threshold (or None, prepares
+        # off) leaves the decision to psycopg, which then prepares after that many runs (or never).
+        prepare_first_use = prepare_threshold is not None and prepare_threshold <= 1
+        self._prepare: bool | None = True if prepare_first_use else None
+        if plan_cache_mode not in (None, "auto", "force_custom_plan", "force_generic_plan"):
+            # Fail at startup: a bad value would otherwise break every new pooled connection.
+            raise ValueError(f"Invalid plan_cache_mode: {plan_cache_mode!r}")
+        self.plan_cache_mode = plan_cache_mode
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._schema_ready = False
+        # Reads repeat while a user works through the same page. LRU of
+        # (kind, url) -> (updated_at, value, fetched_at); see _cached_read.
+        self._read_cache: OrderedDict[tuple[str, str], tuple[str, object, float]] = OrderedDict()
+        self._read_cache_lock = threading.Lock()
+        # Bumped by every _invalidate: a load that saw it move may hold pre-write data.
+        self._read_cache_gen = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.database_url,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        # By default, server-side prepare every statement from its second run
+                        # on: the SQL strings are fixed, so repeat calls skip parse/plan entirely.
+                        # Rows stay plain tuples (every SELECT has a fixed column list), so no
+                        # per-row dict.
+                        kwargs={"prepare_threshold": self.prepare_threshold},
+                        configure=self._configure_connection,
+                        open=True,
+                    )
+        return self._pool
+
+    def _configure_connection(self, conn) -> None:
+        # Runs once per new pooled connection. Opt-in override for Postgres' switch to a
+        # generic plan after five executions of a prepared statement (e.g. force_custom_plan
+        # if a generic plan misbehaves on skewed data); off by default, as every hot
+        # statement here is a primary-key / url-index lookup that a generic plan serves well.
+        if self.plan_cache_mode:
+            conn.execute("SELECT set_config('plan_cache_mode', %s, false);", (self.plan_cache_mode,))
+            conn.commit()
 
     def _connect(self):
-        # Import lazily so local dev can run without Postgres deps installed
-        # (and only requires psycopg when DATABASE_URL is set).
-        import psycopg  # type: ignore
-        from psycopg.rows import dict_row  # type: ignore
-
-        return psycopg.connect(self.database_url, row_factory=dict_row)
+        # Pooled: the with-block commits (or rolls back) and hands the connection back
+        # instead of closing it, so requests skip TCP/TLS/auth setup.
+        return self._get_pool().connection()
+
+    @contextmanager
+    def _connect_autocommit(self):
+        # For single-statement writes and reads: the server runs each statement as its own
+        # implicit transaction, so there is no BEGIN/COMMIT round trip around it.
+        with self._get_pool().connection() as conn:
+            conn.autocommit = True
+            try:
+                yield conn
+            finally:
+                if not conn.closed:
+                    conn.autocommit = False
+
+    def _cached_read(self, kind: str, url: str, load):
+        # Entries younger than _READ_CACHE_FRESH_S are served as is. Older ones are revalidated
+        # with a one-column updated_at probe (every write bumps it, from any worker) and only
+        # reloaded when it moved. Writes through this repo drop the url's entries outright.
+        key = (kind, url)
+        with self._read_cache_lock:
+            hit = self._read_cache.get(key)
+            if hit is not None:
+                self._read_cache.move_to_end(key)
+            gen = self._read_cache_gen
+        now = time.monotonic()
+        if hit is not None and now - hit[2] < _READ_CACHE_FRESH_S:
+            return hit[1]
+
+        with self._connect_autocommit() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_SQL_SELECT_UPDATED_AT, (url,), prepare=self._prepare)
+                row = cur.fetchone()
+        if row is None:
+            self._invalidate(url)
+            return None
+        updated_at = row[0]
+        value = hit[1] if hit is not None and hit[0] == updated_at else load()
+        if value is not None:
+            with self._read_cache_lock:
+                # A write through this repo landed during the probe/load, so value may predate
+                # it; storing it would serve it as fresh. Return it, but don't cache it. (Writes
+                # from other workers are caught by the probe once the entry goes stale.)
+                if self._read_cache_gen != gen:
+                    return value
+                self._read_cache[key] = (updated_at, value, now)
+                self._read_cache.move_to_end(key)
+                while len(self._read_cache) > _READ_CACHE_SIZE:
+                    self._read_cache.popitem(last=False)
+        return value
 
-    def ensure_schema(self) -> None:
+    def _invalidate(self, url: str) -> None:
+        with self._read_cache_lock:
+            self._read_cache_gen += 1
+            self._read_cache.pop(("record", url), None)
+            self._read_cache.pop(("json", url), None)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    def ensure_schema(self, force: bool = False) -> None:
+        # Once per process. A catalog probe skips the DDL/heal block entirely when the schema is
+        # already current, so routine restarts take no ALTER TABLE locks and scan no rows.
+        # force=True (python -m backend migrate) runs everything regardless.
+        if self._schema_ready and not force:
+            return
         with self._connect() as conn:
             with conn.cursor() as cur:
+                # Keep in sync with the end state produced below. Legacy questions/turns jsonb
+                # columns may remain (only `migrate` drops them), so they don't count.
                 cur.execute(
                     """
-                    CREATE TABLE IF NOT EXISTS notes (
-                      url TEXT PRIMARY KEY,
-                      summary TEXT NOT NULL DEFAULT '',
-                      questions JSONB NOT NULL DEFAULT '[]'::jsonb,
-                      turns JSONB NOT NULL DEFAULT '[]'::jsonb,
-                      updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
-                    );
+                    SELECT to_regclass('notes_qa') IS NOT NULL
+                       AND to_regclass('notes_quizzes') IS NOT NULL
+                       AND to_regclass('notes_turns') IS NOT NULL
+                       AND to_regclass('notes_questions') IS NOT NULL
+                       AND NOT EXISTS (
+                         SELECT 1 FROM information_schema.columns
+                          WHERE table_schema = current_schema() AND table_name = 'notes'
+                            AND column_name IN ('qa', 'quizzes')
+                       ) AS current;
                     """
                 )
-                # Back-compat for older deployments where the table existed without these columns.
-                cur.execute("ALTER TABLE notes ADD COLUMN IF NOT EXISTS questions JSONB NOT NULL DEFAULT '[]'::jsonb;")
-                cur.execute("ALTER TABLE notes ADD COLUMN IF NOT EXISTS turns JSONB NOT NULL DEFAULT '[]'::jsonb;")
-                # We no longer store QA/quizzes in JSONB columns (moved to relational tables below).
-                # Drop legacy columns if they exist to avoid type/default/constraint mismatches causing 500s.
-                cur.execute("ALTER TABLE notes DROP COLUMN IF EXISTS qa;")
-                cur.execute("ALTER TABLE notes DROP COLUMN IF EXISTS quizzes;")
-
-                # Heal any legacy NULLs so jsonb concatenation never fails.
-                cur.execute("UPDATE notes SET questions = '[]'::jsonb WHERE questions IS NULL;")
-                cur.execute("UPDATE notes SET turns = '[]'::jsonb WHERE turns IS NULL;")
-                cur.execute("UPDATE notes SET questions = '[]'::jsonb WHERE jsonb_typeof(questions) <> 'array';")
-                cur.execute("UPDATE notes SET turns = '[]'::jsonb WHERE jsonb_typeof(turns) <> 'array';")
-
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS notes_qa (
-                      id BIGSERIAL PRIMARY KEY,
-                      url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
-                      q TEXT NOT NULL,
-                      a TEXT NOT NULL,
-                      created_at TIMESTAMPTZ NOT NULL DEFAULT now()
-                    );
-                    """
-                )
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_qa_url ON notes_qa(url);")
-
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS notes_quizzes (
-                      id BIGSERIAL PRIMARY KEY,
-                      url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
-                      question TEXT NOT NULL,
-                      user_answer TEXT NOT NULL DEFAULT '',
-                      correct_answer TEXT NOT NULL DEFAULT '',
-                      explanation TEXT NOT NULL DEFAULT '',
-                      created_at TIMESTAMPTZ NOT NULL DEFAULT now()
-                    );
-                    """
-                )
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_quizzes_url ON notes_quizzes(url);")
+                row = cur.fetchone()
+                if row and row[0] and not force:
+                    self._schema_ready = True
+                    return
+
+                # The lock and DDL need no results, so they go out in one pipeline: a first
+                # deploy or migrate pays one round trip for them instead of one per statement.
+                with conn.pipeline():
+                    # Serialize concurrent workers so the one-off data migrations below run once.
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext('notes.ensure_schema'));")
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS notes (
+                          url TEXT PRIMARY KEY,
+                          summary TEXT NOT NULL DEFAULT '',
+                          updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                        """
+                    )
+                    # We no longer store QA/quizzes in JSONB columns (moved to relational tables below).
+                    # Drop legacy columns if they exist to avoid type/default/constraint mismatches causing 500s.
+                    cur.execute("ALTER TABLE notes DROP COLUMN IF EXISTS qa;")
+                    cur.execute("ALTER TABLE notes DROP COLUMN IF EXISTS quizzes;")
+
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS notes_qa (
+                          id BIGSERIAL PRIMARY KEY,
+                          url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
+                          q TEXT NOT NULL,
+                          a TEXT NOT NULL,
+                          created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                        """
+                    )
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_qa_url ON notes_qa(url);")
+
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS notes_quizzes (
+                          id BIGSERIAL PRIMARY KEY,
+                          url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
+                          question TEXT NOT NULL,
+                          user_answer TEXT NOT NULL DEFAULT '',
+                          correct_answer TEXT NOT NULL DEFAULT '',
+                          explanation TEXT NOT NULL DEFAULT '',
+                          created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                        """
+                    )
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_quizzes_url ON notes_quizzes(url);")
+
+                    # Transcript turns are append-heavy, so they get a side table too: an append
+                    # writes one small row instead of rewriting the whole jsonb history.
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS notes_turns (
+                          id BIGSERIAL PRIMARY KEY,
+                          url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
+                          role TEXT NOT NULL,
+                          text TEXT NOT NULL,
+                          created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                        """
+                    )
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_turns_url ON notes_turns(url, id);")
+
+                    # Questions get the same treatment, so the parent notes row stays narrow and is
+                    # only ever touched for summary/updated_at.
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS notes_questions (
+                          id BIGSERIAL PRIMARY KEY,
+                          url TEXT NOT NULL REFERENCES notes(url) ON DELETE CASCADE,
+                          question TEXT NOT NULL,
+                          created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                        """
+                    )
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_questions_url ON notes_questions(url, id);")
+
+                self._migrate_data(cur, drop_legacy=force)
             conn.commit()
-
-    def _get_full_record(self, conn, url: str) -> NotesRecord | None:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT url, summary, questions, turns, updated_at FROM notes WHERE url = %s;",
-                (url,),
-            )
-            row = cur.fetchone()
-            if not row:
-                return None
-
+        self._schema_ready = True
+
+    def _migrate_data(self, cur, drop_legacy: bool) -> None:
+        # Row-touching upgrades for legacy deployments. Only reached when the probe in
+        # ensure_schema finds the schema behind (or via `python -m backend migrate`).
+        # Startup only copies the legacy jsonb history: during a rolling deploy (or after a
+        # rollback) older revisions still read and write those columns. Dropping them is left
+        # to `python -m backend migrate` (drop_legacy=True), once no old revision is serving.
+        # A url already present in a side table is skipped, so a re-run copies nothing twice.
+
+        # Older deployments kept questions in a notes.questions jsonb column: copy them over.
+        # NULLs and non-arrays (legacy data) contribute nothing.
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+             WHERE table_schema = current_schema() AND table_name = 'notes' AND column_name = 'questions';
+            """
+        )
+        if cur.fetchone():
             cur.execute(
-                "SELECT q, a FROM notes_qa WHERE url = %s ORDER BY id ASC;",
-                (url,),
+                """
+                INSERT INTO notes_questions (url, question)
+                SELECT n.url, q.elem
+                  FROM notes n
+                  CROSS JOIN LATERAL jsonb_array_elements_text(
+                    CASE WHEN jsonb_typeof(n.questions) = 'array' THEN n.questions ELSE '[]'::jsonb END
+                  ) WITH ORDINALITY AS q(elem, ord)
+                 WHERE q.elem IS NOT NULL
+                   AND NOT EXISTS (SELECT 1 FROM notes_questions x WHERE x.url = n.url)
+                 ORDER BY n.url, q.ord;
+                """
             )
-            qa_rows = cur.fetchall() or []
-
+            if drop_legacy:
+                cur.execute("ALTER TABLE notes DROP COLUMN questions;")
+
+        # Older deployments kept turns in a notes.turns jsonb column: copy them over.
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+             WHERE table_schema = current_schema() AND table_name = 'notes' AND column_name = 'turns';
+            """
+        )
+        if cur.fetchone():
             cur.execute(
                 """
-                SELECT question, user_answer, correct_answer, explanation
-                  FROM notes_quizzes
-                 WHERE url = %s
-                 ORDER BY id ASC;
-                """,
-                (url,),
+                INSERT INTO notes_turns (url, role, text)
+                SELECT n.url, COALESCE(t.elem->>'role', 'agent'), COALESCE(t.elem->>'text', '')
+                  FROM notes n
+                  CROSS JOIN LATERAL jsonb_array_elements(
+                    CASE WHEN jsonb_typeof(n.turns) = 'array' THEN n.turns ELSE '[]'::jsonb END
+                  ) WITH ORDINALITY AS t(elem, ord)
+                 WHERE NOT EXISTS (SELECT 1 FROM notes_turns x WHERE x.url = n.url)
+                 ORDER BY n.url, t.ord;
+                """
             )
-            quiz_rows = cur.fetchall() or []
-
-        rec = _row_to_record(row)
-        rec.qa = [{"q": (r.get("q") or ""), "a": (r.get("a") or "")} for r in qa_rows]
-        rec.quizzes = [
-            {
-                "question": (r.get("question") or ""),
-                "userAnswer": (r.get("user_answer") or ""),
-                "correctAnswer": (r.get("correct_answer") or ""),
-                "explanation": (r.get("explanation") or ""),
-            }
-            for r in quiz_rows
-        ]
-        return rec
+            if drop_legacy:
+                cur.execute("ALTER TABLE notes DROP COLUMN turns;")
+
+    def _get_full_record(self, conn, url: str) -> NotesRecord | None:
+        # One round trip, and the same statement (so the same prepared plan) get_json serves:
+        # Postgres aggregates the side tables into the API-shaped document, parsed once here.
+        with conn.cursor() as cur:
+            cur.execute(_SQL_SELECT_NOTE_JSON, (url,), prepare=self._prepare)
+            row = cur.fetchone()
+        return _row_to_record(row) if row else None
 
     def reset(self, url: str) -> NotesRecord:
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO UPDATE
-                      SET summary = EXCLUDED.summary,
-                          questions = EXCLUDED.questions,
-                          turns = EXCLUDED.turns,
-                          updated_at = EXCLUDED.updated_at
-                    RETURNING url;
-                    """,
-                    (url,),
-                )
-                cur.fetchone()
-
-                cur.execute("DELETE FROM notes_qa WHERE url = %s;", (url,))
-                cur.execute("DELETE FROM notes_quizzes WHERE url = %s;", (url,))
-            conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
+                cur.execute(_SQL_RESET_NOTE, (url,), prepare=self._prepare)
+                row = cur.fetchone()
+        self._invalidate(url)
+        if not row:
             raise ValueError("Missing row")
-        return rec
+        return NotesRecord(url=url, updated_at=row[0])
 
     def set_summary(self, url: str, summary: str) -> NotesRecord:
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, %s, '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO UPDATE
-                      SET summary = EXCLUDED.summary,
-                          updated_at = EXCLUDED.updated_at
-                    RETURNING url;
-                    """,
-                    (url, summary.strip()),
-                )
-                cur.fetchone()
-            conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
-            raise ValueError("Missing row")
-        return rec
+                cur.execute(_SQL_SET_SUMMARY_NOTE, (url, summary), prepare=self._prepare)
+                row = cur.fetchone()
+        self._invalidate(url)
+        return _row_to_record(row)
 
-    def append_question(self, url: str, question: str) -> NotesRecord:
-        q = (question or "").strip()
-        if not q:
+    def append_question(self, url: str, question: str) -> NotesAppendResult:
+        if not question:
             raise ValueError("Missing question")
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO NOTHING;
-                    """,
-                    (url,),
-                )
-                cur.execute(
-                    """
-                    UPDATE notes
-                       SET questions = COALESCE(questions, '[]'::jsonb) || jsonb_build_array(%s::text),
-                           updated_at = now()
-                     WHERE url = %s
-                    RETURNING url;
-                    """,
-                    (q, url),
-                )
-                cur.fetchone()
-            conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
-            raise ValueError("Missing row")
-        return rec
-
-    def append_turn(self, url: str, role: str, text: str) -> NotesRecord:
-        r = (role or "").strip().lower()
-        if r not in {"user", "agent"}:
-            r = "agent"
-        t = (text or "").strip()
-        if not t:
+                # One round trip: create the row if missing, otherwise append to it.
+                cur.execute(_SQL_APPEND_QUESTION, (url, question), prepare=self._prepare)
+                row = cur.fetchone()
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
+
+    def append_turn(self, url: str, role: str, text: str) -> NotesAppendResult:
+        if not text:
             raise ValueError("Missing text")
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO NOTHING;
-                    """,
-                    (url,),
-                )
-                cur.execute(
-                    """
-                    UPDATE notes
-                       SET turns = COALESCE(turns, '[]'::jsonb) || jsonb_build_array(
-                             jsonb_build_object('role', %s::text, 'text', %s::text)
-                           ),
-                           updated_at = now()
-                     WHERE url = %s
-                    RETURNING url;
-                    """,
-                    (r, t, url),
-                )
-                cur.fetchone()
+                cur.execute(_SQL_APPEND_TURN, (url, normalize_role(role), text), prepare=self._prepare)
+                row = cur.fetchone()
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
+
+    def append_turns_many(self, url: str, turns: list[tuple[str, str]]) -> NotesAppendResult:
+        rows = [(url, normalize_role(role), text) for role, text in turns if text]
+        if not rows:
+            raise ValueError("Missing text")
+        with self._connect() as conn:
+            if len(rows) >= _COPY_MIN_ROWS:
+                # Long transcript imports: COPY streams the rows without per-row statement
+                # work, which outweighs the two extra round trips (COPY can't be pipelined).
+                with conn.cursor() as cur:
+                    cur.execute(_SQL_ENSURE_NOTE, (url,), prepare=self._prepare)
+                    with cur.copy(_SQL_COPY_TURNS) as copy:
+                        for r in rows:
+                            copy.write_row(r)
+                    cur.execute(_SQL_BUMP_TURNS, (url, url), prepare=self._prepare)
+                    row = cur.fetchone()
+            else:
+                # Same shape as append_qa_many: pipelined, so the import costs one round trip.
+                with conn.pipeline():
+                    with conn.cursor() as cur:
+                        cur.execute(_SQL_ENSURE_NOTE, (url,), prepare=self._prepare)
+                        cur.executemany(_SQL_INSERT_TURN, rows)
+                        cur.execute(_SQL_BUMP_TURNS, (url, url), prepare=self._prepare)
+                        row = cur.fetchone()
             conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
-            raise ValueError("Missing row")
-        return rec
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
 
-    def append_qa(self, url: str, question: str, answer: str) -> NotesRecord:
-        q = (question or "").strip()
-        a = (answer or "").strip()
-        if not q or not a:
+    def append_qa(self, url: str, question: str, answer: str) -> NotesAppendResult:
+        if not question or not answer:
             raise ValueError("Missing question/answer")
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO NOTHING;
-                    """,
-                    (url,),
-                )
-                cur.execute(
-                    "INSERT INTO notes_qa (url, q, a) VALUES (%s, %s, %s);",
-                    (url, q, a),
-                )
-                cur.execute("UPDATE notes SET updated_at = now() WHERE url = %s;", (url,))
+                cur.execute(_SQL_APPEND_QA, (url, question, answer), prepare=self._prepare)
+                row = cur.fetchone()
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
+
+    def append_qa_many(self, url: str, pairs: list[tuple[str, str]]) -> NotesAppendResult:
+        rows = [(url, question, answer) for question, answer in pairs if question and answer]
+        if not rows:
+            raise ValueError("Missing question/answer")
+        with self._connect() as conn:
+            # Pipeline mode: all statements go out back-to-back and the fetchone() below
+            # is the only wait, so N pairs cost one round trip instead of N+2.
+            with conn.pipeline():
+                with conn.cursor() as cur:
+                    cur.execute(_SQL_ENSURE_NOTE, (url,), prepare=self._prepare)
+                    cur.executemany(_SQL_INSERT_QA, rows)
+                    cur.execute(_SQL_BUMP_QA, (url, url), prepare=self._prepare)
+                    row = cur.fetchone()
             conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
-            raise ValueError("Missing row")
-        return rec
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
 
     def append_quiz(
         self, url: str, question: str, user_answer: str, correct_answer: str, explanation: str
-    ) -> NotesRecord:
-        q = (question or "").strip()
-        if not q:
+    ) -> NotesAppendResult:
+        if not question:
             raise ValueError("Missing question")
-        ua = (user_answer or "").strip()
-        ca = (correct_answer or "").strip()
-        ex = (explanation or "").strip()
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO NOTHING;
-                    """,
-                    (url,),
+                    _SQL_APPEND_QUIZ,
+                    (url, question, user_answer, correct_answer, explanation),
+                    prepare=self._prepare,
                 )
-                cur.execute(
-                    """
-                    INSERT INTO notes_quizzes (url, question, user_answer, correct_answer, explanation)
-                    VALUES (%s, %s, %s, %s, %s);
-                    """,
-                    (url, q, ua, ca, ex),
-                )
-                cur.execute("UPDATE notes SET updated_at = now() WHERE url = %s;", (url,))
-            conn.commit()
-            rec = self._get_full_record(conn, url)
-        if not rec:
-            raise ValueError("Missing row")
-        return rec
+                row = cur.fetchone()
+        self._invalidate(url)
+        return _row_to_append_result(url, row)
 
     def get(self, url: str) -> NotesRecord | None:
-        with self._connect() as conn:
+        return self._cached_read("record", url, lambda: self._load_record(url))
+
+    def _load_record(self, url: str) -> NotesRecord | None:
+        with self._connect_autocommit() as conn:
             rec = self._get_full_record(conn, url)
         return rec
 
+    def get_json(self, url: str) -> bytes | None:
+        """
+        GET /notes body, built by Postgres: the jsonb columns and side-table rows are never
+        parsed into Python objects only to be serialized straight back out.
+        """
+        return self._cached_read("json", url, lambda: self._load_json(url))
+
+    def _load_json(self, url: str) -> bytes | None:
+        with self._connect_autocommit() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_SQL_SELECT_NOTE_JSON, (url,), prepare=self._prepare)
+                row = cur.fetchone()
+        return row[0].encode("utf-8") if row else None
+
     def list_sessions(self, limit: int = 50) -> list[dict[str, str]]:
         lim = max(1, min(int(limit or 50), 200))
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                # LIMIT doesn't accept a bind param in all drivers/settings; interpolate safe int.
-                cur.execute(
-                    f"SELECT url, updated_at FROM notes ORDER BY updated_at DESC LIMIT {lim};"
-                )
+                # psycopg binds server-side, so LIMIT takes a parameter and the text stays constant.
+                cur.execute(_SQL_LIST_SESSIONS, (lim,), prepare=self._prepare)
                 rows = cur.fetchall() or []
         out: list[dict[str, str]] = []
-        for r in rows:
-            ua = r.get("updated_at")
+        for url, ua in rows:
             out.append(
                 {
-                    "url": r.get("url") or "",
-                    "updatedAt": ua.isoformat() if hasattr(ua, "isoformat") else str(ua or ""),
+                    "url": url or "",
+                    "updatedAt": ua,
                 }
             )
         return [x for x in out if x["url"]]
 
     def delete_session(self, url: str) -> None:
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute("DELETE FROM notes WHERE url = %s;", (url,))
-            conn.commit()
+                cur.execute(_SQL_DELETE_NOTE, (url,), prepare=self._prepare)
+        self._invalidate(url)
 
     def touch_session(self, url: str) -> None:
-        with self._connect() as conn:
+        with self._connect_autocommit() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO notes (url, summary, questions, turns, updated_at)
-                    VALUES (%s, '', '[]'::jsonb, '[]'::jsonb, now())
-                    ON CONFLICT (url) DO UPDATE
-                      SET updated_at = now();
-                    """,
-                    (url,),
-                )
+                cur.execute(_SQL_TOUCH_NOTE, (url,), prepare=self._prepare)
+        self._invalidate(url)
+
+    @contextmanager
+    def batch(self, url: str) -> Iterator[NotesBatch]:
+        b = NotesBatch(url)
+        yield b
+        if not b.ops:
+            return
+        with self._connect() as conn:
+            # One transaction, pipelined: the whole burst costs a single round trip.
+            with conn.pipeline():
+                with conn.cursor() as cur:
+                    for kind, params in b.ops:
+                        cur.execute(_SQL_BATCH_OPS[kind], (url, *params), prepare=self._prepare)
             conn.commit()
+        self._invalidate(url)
 
 
-def _row_to_record(row: dict | None) -> NotesRecord:
+def _row_to_record(row: tuple | None) -> NotesRecord:
+    # Row shape: (document,), the _SQL_NOTE_DOC json text.
+    if not row:
+        raise ValueError("Missing row")
+    doc = orjson.loads(row[0])
+    return NotesRecord(
+        url=doc["url"],
+        summary=doc["summary"],
+        questions=doc["questions"],
+        turns=[NotesTurn(t["role"], t["text"]) for t in doc["turns"]],
+        qa=[NotesQA(p["q"], p["a"]) for p in doc["qa"]],
+        quizzes=[
+            NotesQuiz(z["question"], z["userAnswer"], z["correctAnswer"], z["explanation"])
+            for z in doc["quizzes"]
+        ],
+        updated_at=doc["updatedAt"],
+    )
+
+
+def _row_to_append_result(url: str, row: tuple | None) -> NotesAppendResult:
+    # Row shape: (size, updated_at), as RETURNed by every append statement.
     if not row:
         raise ValueError("Missing row")
-    rec = NotesRecord(url=row["url"])
-    rec.summary = row.get("summary") or ""
-    rec.questions = _coerce_json_list(row.get("questions"))
-    rec.turns = _coerce_json_list(row.get("turns"))
-    rec.qa = []
-    rec.quizzes = []
-    rec.updated_at = (row.get("updated_at") or "").isoformat() if hasattr(row.get("updated_at"), "isoformat") else str(row.get("updated_at"))
-    return rec
+    size, ua = row
+    return NotesAppendResult(
+        url=url,
+        updated_at=ua,
+        size=int(size or 0),
+    )
 
 
-def _coerce_json_list(value) -> list:
-    """
-    Psycopg JSONB typically comes back as Python objects, but can be returned as a JSON string
-    depending on adapters / drivers. Normalize to a Python list for API serialization.
-    """
-    if value is None:
-        return []
-    if isinstance(value, list):
-        return value
-    if isinstance(value, (bytes, bytearray)):
-        try:
-            value = value.decode("utf-8")
-        except Exception:
-            return []
-    if isinstance(value, str):
-        s = value.strip()
-        if not s:
-            return []
-        try:
-            parsed = json.loads(s)
-            return parsed if isinstance(parsed, list) else []
-        except Exception:
-            return []
-    # Unknown type (e.g. a driver wrapper). Best-effort: try JSON serialization.
-    try:
-        parsed = json.loads(str(value))
-        return parsed if isinstance(parsed, list) else []
-    except Exception:
-        return []
+def _prepare_threshold_from_env() -> int | None:
+    # DATABASE_PREPARE_THRESHOLD=off (or none) for PgBouncer transaction pooling; unset keeps 1.
+    raw = (os.environ.get("DATABASE_PREPARE_THRESHOLD") or "").strip().lower()
+    if not raw:
+        return 1
+    if raw in {"off", "none"}:
+        return None
+    return int(raw)
 
 
+@functools.cache
 def make_notes_repo() -> NotesRepo:
+    # One repo (and so one connection pool) per process, however many callers ask for it.
     db_url = (os.environ.get("DATABASE_URL") or "").strip()
     if db_url:
-        repo = PostgresNotesRepo(db_url)
+        if ConnectionPool is None:
+            raise RuntimeError("DATABASE_URL is set but psycopg is not installed (pip install -r requirements.txt)")
+        repo = PostgresNotesRepo(
+            db_url,
+            min_size=int(os.environ.get("DATABASE_POOL_MIN_SIZE") or 1),
+            max_size=int(os.environ.get("DATABASE_POOL_MAX_SIZE") or 10),
+            plan_cache_mode=(os.environ.get("DATABASE_PLAN_CACHE_MODE") or "").strip() or None,
+            prepare_threshold=_prepare_threshold_from_env(),
+        )
+        # The app's shutdown hook closes the pool too; this covers scripts and abrupt exits.
+        atexit.register(repo.close)
         return repo
     return InMemoryNotesRepo()
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
@@ -8,74 +10,166 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-@dataclass
+# History rows are small slotted records rather than dicts (a fraction of the memory per row);
+# they become JSON objects only at the API boundary.
+@dataclass(slots=True)
+class NotesTurn:
+    role: str  # "user" | "agent"
+    text: str
+
+
+@dataclass(slots=True)
+class NotesQA:
+    q: str
+    a: str
+
+
+@dataclass(slots=True)
+class NotesQuiz:
+    question: str
+    user_answer: str
+    correct_answer: str
+    explanation: str
+
+
+@dataclass(slots=True)
 class NotesRecord:
     url: str
     summary: str = ""
     questions: list[str] = field(default_factory=list)
-    turns: list[dict[str, str]] = field(default_factory=list)  # [{"role":"user|agent","text":"..."}]
-    qa: list[dict[str, str]] = field(default_factory=list)  # [{"q":"...","a":"..."}]
-    quizzes: list[dict[str, str]] = field(default_factory=list)  # [{"question","userAnswer","correctAnswer","explanation"}]
+    turns: list[NotesTurn] = field(default_factory=list)
+    qa: list[NotesQA] = field(default_factory=list)
+    quizzes: list[NotesQuiz] = field(default_factory=list)
     updated_at: str = field(default_factory=_now_iso)
 
     def touch(self) -> None:
         self.updated_at = _now_iso()
 
 
+@dataclass(slots=True)
+class NotesAppendResult:
+    """What an append returns: enough to acknowledge the write without re-reading the record."""
+
+    url: str
+    updated_at: str
+    size: int  # number of items in the appended-to list after the write
+
+
 # MVP storage: in-memory (will reset if the Cloud Run instance restarts).
-_STORE: dict[str, NotesRecord] = {}
+# Writers serialize on _STORE_LOCK so concurrent appends to one url can't drop each other;
+# readers take no lock (single dict lookups are atomic under the GIL).
+# Capped at _MAX_NOTES urls so a long-lived instance can't grow without bound: writes move a
+# url to the end, and the least recently written note is dropped first.
+_MAX_NOTES = 1024
+_STORE: OrderedDict[str, NotesRecord] = OrderedDict()
+_STORE_LOCK = threading.Lock()
 
 
-def reset_notes(url: str) -> NotesRecord:
-    rec = NotesRecord(url=url)
+def _put(url: str, rec: NotesRecord) -> None:
+    # Caller holds _STORE_LOCK.
     _STORE[url] = rec
-    return rec
+    _STORE.move_to_end(url)
+    while len(_STORE) > _MAX_NOTES:
+        _STORE.popitem(last=False)
+
+
+def reset_notes(url: str) -> NotesRecord:
+    with _STORE_LOCK:
+        rec = NotesRecord(url=url)
+        _put(url, rec)
+        return rec
 
 
 def get_notes(url: str) -> NotesRecord | None:
     return _STORE.get(url)
 
 
+def list_notes(limit: int = 50) -> list[NotesRecord]:
+    # list() snapshots the values in one C-level call, so a concurrent insert can't
+    # break the iteration.
+    items = sorted(list(_STORE.values()), key=lambda r: r.updated_at or "", reverse=True)
+    return items[: max(1, int(limit))]
+
+
+def delete_notes(url: str) -> None:
+    with _STORE_LOCK:
+        _STORE.pop(url, None)
+
+
+def touch_notes(url: str) -> NotesRecord:
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        rec.touch()
+        _put(url, rec)
+        return rec
+
+
+# Text arrives already trimmed (the request models strip whitespace at the API boundary).
+
+
+def normalize_role(role: str) -> str:
+    r = role.lower()
+    return r if r in {"user", "agent"} else "agent"
+
+
 def set_summary(url: str, summary: str) -> NotesRecord:
-    rec = _STORE.get(url) or NotesRecord(url=url)
-    rec.summary = summary.strip()
-    rec.touch()
-    _STORE[url] = rec
-    return rec
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        rec.summary = summary
+        rec.touch()
+        _put(url, rec)
+        return rec
 
 
 def append_question(url: str, question: str) -> NotesRecord:
-    rec = _STORE.get(url) or NotesRecord(url=url)
-    q = question.strip()
-    if q:
-        rec.questions.append(q)
-    rec.touch()
-    _STORE[url] = rec
-    return rec
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        if question:
+            rec.questions.append(question)
+        rec.touch()
+        _put(url, rec)
+        return rec
 
 
 def append_turn(url: str, role: str, text: str) -> NotesRecord:
-    rec = _STORE.get(url) or NotesRecord(url=url)
-    r = (role or "").strip().lower()
-    if r not in {"user", "agent"}:
-        r = "agent"
-    t = (text or "").strip()
-    if t:
-        rec.turns.append({"role": r, "text": t})
-    rec.touch()
-    _STORE[url] = rec
-    return rec
+    r = normalize_role(role)
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        if text:
+            rec.turns.append(NotesTurn(r, text))
+        rec.touch()
+        _put(url, rec)
+        return rec
+
+
+def append_turns_many(url: str, turns: list[tuple[str, str]]) -> NotesRecord:
+    items = [NotesTurn(normalize_role(role), text) for role, text in turns if text]
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        rec.turns.extend(items)
+        rec.touch()
+        _put(url, rec)
+        return rec
 
 
 def append_qa(url: str, question: str, answer: str) -> NotesRecord:
-    rec = _STORE.get(url) or NotesRecord(url=url)
-    q = (question or "").strip()
-    a = (answer or "").strip()
-    if q and a:
-        rec.qa.append({"q": q, "a": a})
-    rec.touch()
-    _STORE[url] = rec
-    return rec
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        if question and answer:
+            rec.qa.append(NotesQA(question, answer))
+        rec.touch()
+        _put(url, rec)
+        return rec
+
+
+def append_qa_many(url: str, pairs: list[tuple[str, str]]) -> NotesRecord:
+    items = [NotesQA(question, answer) for question, answer in pairs if question and answer]
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        rec.qa.extend(items)
+        rec.touch()
+        _put(url, rec)
+        return rec
 
 
 def append_quiz(
@@ -85,22 +179,41 @@ def append_quiz(
     correct_answer: str,
     explanation: str,
 ) -> NotesRecord:
-    rec = _STORE.get(url) or NotesRecord(url=url)
-    q = (question or "").strip()
-    ua = (user_answer or "").strip()
-    ca = (correct_answer or "").strip()
-    ex = (explanation or "").strip()
-    if q:
-        rec.quizzes.append(
-            {
-                "question": q,
-                "userAnswer": ua,
-                "correctAnswer": ca,
-                "explanation": ex,
-            }
+    with _STORE_LOCK:
+        rec = _STORE.get(url) or NotesRecord(url=url)
+        if question:
+            rec.quizzes.append(NotesQuiz(question, user_answer, correct_answer, explanation))
+        rec.touch()
+        _put(url, rec)
+        return rec
+
+
+def apply_batch(url: str, ops: list[tuple[str, tuple[str, ...]]]) -> NotesRecord:
+    # A NotesBatch's ops ("summary"/"question"/"turn"/"qa"/"quiz", already validated), applied
+    # to a copy that replaces the record in one step: lock-free readers see all of the batch or
+    # none of it, and an error partway leaves the stored record untouched.
+    with _STORE_LOCK:
+        old = _STORE.get(url) or NotesRecord(url=url)
+        rec = NotesRecord(
+            url=url,
+            summary=old.summary,
+            questions=list(old.questions),
+            turns=list(old.turns),
+            qa=list(old.qa),
+            quizzes=list(old.quizzes),
         )
-    rec.touch()
-    _STORE[url] = rec
-    return rec
-
-
+        for kind, params in ops:
+            if kind == "summary":
+                rec.summary = params[0]
+            elif kind == "question":
+                rec.questions.append(params[0])
+            elif kind == "turn":
+                rec.turns.append(NotesTurn(*params))
+            elif kind == "qa":
+                rec.qa.append(NotesQA(*params))
+            elif kind == "quiz":
+                rec.quizzes.append(NotesQuiz(*params))
+            else:
+                raise ValueError(f"Unknown batch op: {kind!r}")
+        _put(url, rec)
+        return rec
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from enum import Enum
+from typing import Annotated
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
 
 class Difficulty(str, Enum):
@@ -73,40 +74,87 @@ class ExtractResponse(BaseModel):
     cleanedText: str
 
 
-class NotesResetRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class _NotesInput(BaseModel):
+    # Trim text once while parsing, so whitespace-only fields fail min_length here and the
+    # notes repos can store values as given.
+    model_config = ConfigDict(str_strip_whitespace=True)
 
 
-class NotesSetSummaryRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+# The notes key is kept exactly as sent: GET /notes, the docx download and DELETE /sessions take
+# it as a query parameter that isn't trimmed, so trimming it here would split one page in two.
+_NotesUrl = Annotated[str, StringConstraints(strip_whitespace=False, min_length=1)]
+
+
+class NotesResetRequest(_NotesInput):
+    url: _NotesUrl
+
+
+class NotesSetSummaryRequest(_NotesInput):
+    url: _NotesUrl
     summary: str = Field(..., min_length=1, description="Session/page summary to store as notes")
 
 
-class NotesAppendQuestionRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class NotesAppendQuestionRequest(_NotesInput):
+    url: _NotesUrl
     question: str = Field(..., min_length=1, description="A question asked during the call")
 
 
-class NotesAppendTurnRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class NotesAppendTurnRequest(_NotesInput):
+    url: _NotesUrl
     role: str = Field(..., min_length=1, description="Who said it: 'user' or 'agent'")
     text: str = Field(..., min_length=1, description="Utterance text to append to notes")
 
 
-class NotesAppendQARequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class NotesTurnItem(_NotesInput):
+    role: str = Field(..., min_length=1, description="Who said it: 'user' or 'agent'")
+    text: str = Field(..., min_length=1)
+
+
+class NotesAppendTurnsRequest(_NotesInput):
+    url: _NotesUrl
+    turns: list[NotesTurnItem] = Field(..., min_length=1, description="Transcript turns to append in order")
+
+
+class NotesAppendQARequest(_NotesInput):
+    url: _NotesUrl
     question: str = Field(..., min_length=1, description="User question (or tutor prompt) to store in notes")
     answer: str = Field(..., min_length=1, description="Tutor answer to store in notes")
 
 
-class NotesAppendQuizRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class NotesQAItem(_NotesInput):
+    question: str = Field(..., min_length=1)
+    answer: str = Field(..., min_length=1)
+
+
+class NotesAppendQAManyRequest(_NotesInput):
+    url: _NotesUrl
+    items: list[NotesQAItem] = Field(..., min_length=1, description="Q&A pairs to append in order")
+
+
+class NotesAppendQuizRequest(_NotesInput):
+    url: _NotesUrl
     question: str = Field(..., min_length=1, description="Quiz question/prompt")
     userAnswer: str = Field("", description="User answer (optionally polished)")
     correctAnswer: str = Field("", description="Correct answer")
     explanation: str = Field("", description="Short explanation / feedback")
 
 
+class NotesQuizItem(_NotesInput):
+    question: str = Field(..., min_length=1)
+    userAnswer: str = ""
+    correctAnswer: str = ""
+    explanation: str = ""
+
+
+class NotesAppendBatchRequest(_NotesInput):
+    url: _NotesUrl
+    summary: str | None = Field(None, min_length=1, description="Replaces the summary when set")
+    questions: list[Annotated[str, Field(min_length=1)]] = Field(default_factory=list)
+    turns: list[NotesTurnItem] = Field(default_factory=list)
+    qa: list[NotesQAItem] = Field(default_factory=list)
+    quizzes: list[NotesQuizItem] = Field(default_factory=list)
+
+
 class NotesGetResponse(BaseModel):
     url: str
     summary: str
@@ -117,6 +165,19 @@ class NotesGetResponse(BaseModel):
     updatedAt: str
 
 
+class NotesAppendAckResponse(BaseModel):
+    ok: bool = True
+    url: str
+    size: int = Field(..., description="Number of items in the appended-to list after this write")
+    updatedAt: str
+
+
+class NotesAppendBatchResponse(BaseModel):
+    ok: bool = True
+    url: str
+    written: int = Field(..., description="Number of writes applied (summary + appended items)")
+
+
 class SessionItem(BaseModel):
     url: str
     updatedAt: str
@@ -126,8 +187,8 @@ class SessionsListResponse(BaseModel):
     sessions: list[SessionItem] = Field(default_factory=list)
 
 
-class SessionTouchRequest(BaseModel):
-    url: str = Field(..., min_length=1)
+class SessionTouchRequest(_NotesInput):
+    url: _NotesUrl
 
 
 
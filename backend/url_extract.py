@@ -1,63 +1,251 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import ipaddress
 import re
+import socket
+import threading
+from typing import Iterator
 from urllib.parse import parse_qs, urlparse
 
 import httpx
-from bs4 import BeautifulSoup
+import lxml.html
+from cachetools import TTLCache
+from lxml import etree
 from readability import Document
 from youtube_transcript_api import YouTubeTranscriptApi
 
 
+_HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; VoiceAIStudyCompanion/1.0; +https://example.com)"
+}
+
+# Shared across requests so repeat fetches reuse pooled keep-alive connections
+# instead of paying DNS + TCP + TLS setup on every /extract call.
+# Redirects are followed by _fetch_html itself, so every hop gets the SSRF check.
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(20.0, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+            follow_redirects=False,
+            headers=_HTTP_HEADERS,
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+_FETCHABLE_URL_RE = re.compile(r"^https?://[^\s/?#]+(?:[/?#]\S*)?$", re.IGNORECASE)
+# Cloud metadata endpoints reachable by name from inside Cloud Run / GCE.
+_BLOCKED_HOSTS = frozenset({"localhost", "metadata", "metadata.google.internal"})
+
+
+def ensure_fetchable_url(url: str) -> None:
+    """
+    Cheap pre-screen before any network I/O: only absolute http(s) URLs, and never
+    localhost or literal private/loopback/link-local addresses (SSRF guard).
+    Raises ValueError with a user-facing message. Hostnames and numeric forms such as
+    127.1 are only caught once resolved, by _resolve_public_host before each fetch.
+    """
+    if not _FETCHABLE_URL_RE.match(url):
+        raise ValueError("Only absolute http(s) URLs can be extracted.")
+    host = (urlparse(url).hostname or "").lower().rstrip(".")
+    if not host or host in _BLOCKED_HOSTS or host.endswith(".localhost"):
+        raise ValueError("That URL points at a local address.")
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return
+    if not ip.is_global:
+        raise ValueError("That URL points at a private or local address.")
+
+
+async def _resolve_public_host(url: str) -> str:
+    # Resolve the host and reject it if any address is not public; getaddrinfo also normalises
+    # numeric spellings (2130706433, 0x7f000001, 127.1, 0). Returns the address to connect to:
+    # _fetch_html dials it directly, so a second lookup (DNS rebinding) can't swap in another.
+    ensure_fetchable_url(url)
+    u = urlparse(url)
+    try:
+        port = u.port or (443 if u.scheme.lower() == "https" else 80)
+    except ValueError:  # out-of-range port
+        raise ValueError("Only absolute http(s) URLs can be extracted.")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(u.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError("Could not resolve that URL's host.")
+    for *_, sockaddr in infos:
+        if not ipaddress.ip_address(sockaddr[0]).is_global:
+            raise ValueError("That URL points at a private or local address.")
+    return infos[0][4][0]
+
+
+_WS_BEFORE_NL_RE = re.compile(r"[ \t]+\n")
+_MANY_NL_RE = re.compile(r"\n{3,}")
+
+
 def _clean_text(text: str) -> str:
     text = text.replace("\u00a0", " ")
-    text = re.sub(r"[ \t]+\n", "\n", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _WS_BEFORE_NL_RE.sub("\n", text)
+    text = _MANY_NL_RE.sub("\n\n", text)
     return text.strip()
 
 
 async def fetch_and_extract_main_text(url: str) -> str:
     """
     Fetches HTML and extracts main readable text.
-    Best-effort: Readability -> BeautifulSoup fallback.
+    Best-effort: Readability -> whole-page text fallback.
     """
     # Special-case: YouTube transcript (best-effort; only works if captions are available).
-    yt_text = _try_youtube_transcript(url)
-    if yt_text:
-        return yt_text
-
-    async with httpx.AsyncClient(
-        timeout=20,
-        follow_redirects=True,
-        headers={
-            "User-Agent": "Mozilla/5.0 (compatible; VoiceAIStudyCompanion/1.0; +https://example.com)"
-        },
-    ) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        html = r.text
+    # The transcript client is synchronous network I/O, so run it in a worker thread
+    # rather than stalling every other request on the event loop.
+    vid = _extract_youtube_video_id(url)
+    if vid:
+        yt_text = _transcript_cache.get(vid)
+        if yt_text is None:
+            yt_text = await asyncio.to_thread(_try_youtube_transcript, vid)
+            if yt_text:
+                _transcript_cache[vid] = yt_text
+        if yt_text:
+            return yt_text
 
+    html = await _fetch_html(url)
+    if not html:
+        return ""
+    # Readability and lxml parsing are synchronous CPU work; keep it off the event
+    # loop like the transcript fetch. lxml drops the GIL while parsing.
+    return await asyncio.to_thread(_parse_html, html)
+
+
+def _parse_html(html: str) -> str:
     # Try Readability
     try:
         doc = Document(html)
         content_html = doc.summary(html_partial=True)
-        soup = BeautifulSoup(content_html, "html.parser")
-        text = soup.get_text("\n")
-        text = _clean_text(text)
+        text = _clean_text(_node_text(lxml.html.fromstring(content_html)))
         if len(text) >= 200:
             return text
     except Exception:
         pass
 
     # Fallback: strip scripts/styles and get body text
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside", "form"]):
-        tag.decompose()
-    text = soup.get_text("\n")
-    text = _clean_text(text)
-    return text
+    try:
+        # Bytes plus an explicit encoding: lxml refuses str input that carries an XML encoding
+        # declaration (XHTML), and the declared charset no longer applies to decoded text.
+        root = lxml.html.document_fromstring(html.encode("utf-8"), parser=_html_parser())
+    except etree.ParserError:  # empty or whitespace-only body
+        return ""
+    return _clean_text(_node_text(root, skip=_FALLBACK_SKIP_TAGS))
 
 
+# Pages past this are almost never articles (media, dumps), and would only cost memory and
+# parse time.
+_MAX_HTML_BYTES = 5 * 1024 * 1024
+
+
+_MAX_REDIRECTS = 5
+
+
+async def _fetch_html(url: str) -> str:
+    """
+    Streams the page body, giving up before reading it when the response is not HTML
+    (returns "") or is larger than _MAX_HTML_BYTES (raises ValueError). Redirects are
+    followed here, re-checking each target, so a public URL can't bounce to a private one.
+    """
+    for _ in range(_MAX_REDIRECTS + 1):
+        ip = await _resolve_public_host(url)
+        target = httpx.URL(url)
+        # Dial the vetted address; Host and TLS SNI/certificate checks still use the name.
+        async with _get_http_client().stream(
+            "GET",
+            target.copy_with(host=ip),
+            headers={"Host": target.netloc.decode("ascii")},
+            extensions={"sni_hostname": target.raw_host.decode("ascii")},
+        ) as r:
+            location = r.headers.get("location")
+            if r.is_redirect and location:
+                url = str(target.join(location))
+                continue
+            return await _read_html(r)
+    raise ValueError("That URL redirects too many times.")
+
+
+async def _read_html(r: httpx.Response) -> str:
+    r.raise_for_status()
+    content_type = r.headers.get("content-type", "").lower()
+    if content_type and "html" not in content_type and "xml" not in content_type:
+        return ""
+    too_large = ValueError("That page is too large to extract.")
+    try:
+        declared = int(r.headers.get("content-length") or 0)
+    except ValueError:  # garbage header; the cap below still applies
+        declared = 0
+    if declared > _MAX_HTML_BYTES:
+        raise too_large
+    # Content-Length can be missing or wrong, so the cap is enforced while reading too.
+    body = bytearray()
+    async for chunk in r.aiter_bytes():
+        body += chunk
+        if len(body) > _MAX_HTML_BYTES:
+            raise too_large
+    return body.decode(r.encoding or "utf-8", errors="replace")
+
+
+# huge_tree lifts libxml2's 256-level nesting cap, which would otherwise drop deep text.
+# One parser per worker thread, since _parse_html runs on several at once.
+_parser_local = threading.local()
+
+
+def _html_parser() -> lxml.html.HTMLParser:
+    parser = getattr(_parser_local, "parser", None)
+    if parser is None:
+        parser = _parser_local.parser = lxml.html.HTMLParser(huge_tree=True, encoding="utf-8")
+    return parser
+
+
+_FALLBACK_SKIP_TAGS = frozenset({"script", "style", "noscript", "header", "footer", "nav", "aside", "form"})
+
+
+def _node_text(root, skip: frozenset[str] = frozenset()) -> str:
+    # Every text node, newline-joined, minus comments and the `skip` subtrees (the text after
+    # a skipped tag is kept). Iterative, as real-world pages can nest deeper than Python's
+    # recursion limit.
+    parts: list[str] = [root.text] if root.text else []
+    stack: list[tuple[Iterator, str | None]] = [(iter(root), None)]
+    while stack:
+        children, tail = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if tail:
+                parts.append(tail)
+        elif isinstance(child.tag, str) and child.tag not in skip:
+            if child.text:
+                parts.append(child.text)
+            stack.append((iter(child), child.tail))
+        elif child.tail:
+            parts.append(child.tail)
+    return "\n".join(parts)
+
+
+# Keyed by video id, so youtu.be/, watch?v= and embed/ links (and extra query params) for
+# one video share an entry. Only successes are kept: a failed fetch may be transient.
+# Only touched from the event loop, so no lock is needed.
+_transcript_cache: TTLCache[str, str] = TTLCache(maxsize=1024, ttl=3600)
+
+
+@functools.lru_cache(maxsize=4096)
 def _extract_youtube_video_id(url: str) -> str | None:
     try:
         u = urlparse(url)
@@ -87,16 +275,12 @@ def _extract_youtube_video_id(url: str) -> str | None:
     return None
 
 
-def _try_youtube_transcript(url: str) -> str | None:
-    vid = _extract_youtube_video_id(url)
-    if not vid:
-        return None
-
+def _try_youtube_transcript(vid: str) -> str | None:
     try:
         # Prefer English; will fall back to whatever is available.
         items = YouTubeTranscriptApi.get_transcript(vid, languages=["en", "en-US", "en-GB"])
-        text = "\n".join((it.get("text") or "") for it in items).strip()
-        text = _clean_text(text)
+        # youtube-transcript-api 0.6.x returns plain dicts that always carry "text".
+        text = _clean_text("\n".join([it["text"] for it in items if it["text"]]))
         return text if len(text) >= 200 else None
     except Exception:
         return None
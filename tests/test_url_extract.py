@@ -0,0 +1,120 @@
+import asyncio
+import socket
+import unittest
+from unittest import mock
+
+import httpx
+
+from backend import url_extract
+
+# Fake DNS for the hosts below; anything else goes to the real resolver (numeric spellings
+# such as 127.1 resolve locally without a network).
+_DNS = {
+    "public.test": "93.184.216.34",
+    "private.test": "10.0.0.5",
+    "mapped.test": "::ffff:127.0.0.1",
+}
+_real_getaddrinfo = asyncio.BaseEventLoop.getaddrinfo
+
+
+async def _fake_getaddrinfo(self, host, port, **kwargs):
+    if host in _DNS:
+        addr = _DNS[host]
+        family = socket.AF_INET6 if ":" in addr else socket.AF_INET
+        return [(family, socket.SOCK_STREAM, 6, "", (addr, port))]
+    return await _real_getaddrinfo(self, host, port, **kwargs)
+
+
+_PAGE = "<html><body><p>" + "word " * 60 + "</p></body></html>"
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    routes = {
+        "/to-metadata": "http://169.254.169.254/latest/meta-data",
+        "/to-private": "http://private.test/x",
+        "/to-local-page": "/page",
+        "/loop": "/loop",
+    }
+    if request.url.path in routes:
+        return httpx.Response(302, headers={"location": routes[request.url.path]})
+    headers = {"content-type": "text/html"}
+    if request.url.path == "/bad-length":
+        headers["content-length"] = "abc"
+    return httpx.Response(200, headers=headers, content=_PAGE)
+
+
+class FetchGuardTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(asyncio.BaseEventLoop, "getaddrinfo", _fake_getaddrinfo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.seen: list[httpx.Request] = []
+
+        def handler(request):
+            self.seen.append(request)
+            return _handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=False)
+        client_patcher = mock.patch.object(url_extract, "_http_client", client)
+        client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+
+    async def assert_rejected(self, url: str, message: str) -> None:
+        with self.assertRaises(ValueError) as cm:
+            await url_extract._fetch_html(url)
+        self.assertIn(message, str(cm.exception))
+
+    async def test_numeric_loopback_spellings_rejected(self):
+        for url in ("http://2130706433/", "http://0x7f000001/", "http://127.1/", "http://0/"):
+            with self.subTest(url=url):
+                await self.assert_rejected(url, "private or local address")
+        self.assertEqual(self.seen, [])
+
+    async def test_hosts_resolving_to_private_addresses_rejected(self):
+        for url in ("http://private.test/", "http://mapped.test/"):
+            with self.subTest(url=url):
+                await self.assert_rejected(url, "private or local address")
+        self.assertEqual(self.seen, [])
+
+    async def test_redirects_to_private_addresses_rejected(self):
+        await self.assert_rejected("http://public.test/to-metadata", "private or local address")
+        await self.assert_rejected("http://public.test/to-private", "private or local address")
+
+    async def test_redirect_loop_rejected(self):
+        await self.assert_rejected("http://public.test/loop", "redirects too many times")
+
+    async def test_public_redirect_followed_and_address_pinned(self):
+        html = await url_extract._fetch_html("http://public.test/to-local-page")
+        self.assertIn("word", html)
+        last = self.seen[-1]
+        self.assertEqual(last.url.host, "93.184.216.34")
+        self.assertEqual(last.headers["host"], "public.test")
+
+    async def test_rebinding_host_dialed_at_vetted_address(self):
+        # TTL-0 rebinding: public on the first lookup, loopback on any later one.
+        answers = iter(["93.184.216.34"])
+
+        async def rebinding(loop, host, port, **kwargs):
+            addr = next(answers, "127.0.0.1")
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (addr, port))]
+
+        with mock.patch.object(asyncio.BaseEventLoop, "getaddrinfo", rebinding):
+            await url_extract._fetch_html("http://rebind.test/page")
+        self.assertEqual([r.url.host for r in self.seen], ["93.184.216.34"])
+
+    async def test_unresolvable_host_rejected(self):
+        await self.assert_rejected("http://nosuch.invalid/", "Could not resolve")
+
+    async def test_bad_content_length_ignored(self):
+        html = await url_extract._fetch_html("http://public.test/bad-length")
+        self.assertIn("word", html)
+
+    def test_prescreen_rejects_literal_local_addresses(self):
+        for url in ("http://localhost/", "http://127.0.0.1/", "http://[::1]/", "http://169.254.169.254/", "ftp://x/"):
+            with self.subTest(url=url):
+                with self.assertRaises(ValueError):
+                    url_extract.ensure_fetchable_url(url)
+
+
+if __name__ == "__main__":
+    unittest.main()